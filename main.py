@@ -1,26 +1,32 @@
 import os
+import asyncio
+import functools
 import logging
+import random
 import sqlite3
 import json
+from collections import defaultdict
 from datetime import datetime, time
 from typing import Optional
-from urllib.parse import urlencode
-from urllib.request import urlopen, Request
-from urllib.error import URLError, HTTPError
 from zoneinfo import ZoneInfo  # stdlib
 
+import aiohttp
 from aiohttp import web
 from telegram import Update
-from telegram.ext import Application, ApplicationBuilder, CommandHandler, ContextTypes
+from telegram.ext import AIORateLimiter, Application, ApplicationBuilder, CommandHandler, ContextTypes
 
 # ----------------------------
 # Config / ENV
 # ----------------------------
 BOT_TOKEN = os.getenv("BOT_TOKEN", "REPLACE_ME")
-ADMIN_IDS = {int(x.strip()) for x in os.getenv("ADMIN_IDS", "").split(",") if x.strip().isdigit()}
+ADMIN_IDS: frozenset[int] = frozenset(int(x) for x in map(str.strip, os.getenv("ADMIN_IDS", "").split(",")) if x.isdecimal())
 LIKE_API_BASE = "https://yunus-bhai-like-ff.vercel.app/like"
 LIKE_API_KEY = os.getenv("LIKE_API_KEY", "gst")
 SERVER_NAME = os.getenv("SERVER_NAME", "bd")
+LIKE_CONCURRENCY = max(1, int(os.getenv("LIKE_CONCURRENCY", "16")))  # max in-flight like API calls
+LIKE_BATCH_SIZE = max(1, int(os.getenv("LIKE_BATCH_SIZE", "16")))  # daily job sends likes in batches of this size
+LIKE_API_RETRIES = max(0, int(os.getenv("LIKE_API_RETRIES", "2")))  # extra attempts after a network error or retryable status
+LIKE_CACHE_TTL = int(os.getenv("LIKE_CACHE_TTL", "30"))  # seconds a successful like is reused for the same UID
 
 DB_PATH = os.getenv("DB_PATH", "data.db")
 TZ = ZoneInfo("Asia/Dhaka")
@@ -31,6 +37,7 @@ PORT = int(os.getenv("PORT", "10000"))
 HOST = "0.0.0.0"
 WEBHOOK_PATH = f"/{BOT_TOKEN}"
 HEALTH_PATH = "/healthz"
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "100"))
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 log = logging.getLogger("ff-like-bot")
@@ -40,10 +47,34 @@ log = logging.getLogger("ff-like-bot")
 # ----------------------------
 def db_connect():
     os.makedirs(os.path.dirname(DB_PATH) or ".", exist_ok=True)
-    con = sqlite3.connect(DB_PATH, check_same_thread=False)
+    con = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
     con.row_factory = sqlite3.Row
+    mode = con.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+    if mode != "wal":
+        log.warning(f"SQLite stayed in {mode} journal mode; WAL not available for {DB_PATH}")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.execute("PRAGMA wal_autocheckpoint=1000")
+    con.execute("PRAGMA temp_store=MEMORY")
+    con.execute("PRAGMA cache_size=-20000")  # ~20MB page cache
+    con.execute("PRAGMA mmap_size=268435456")
+    con.execute("PRAGMA foreign_keys=ON")
     return con
 
+SQL_UPSERT_TASK = """
+    INSERT INTO tasks(uid, creator_id, days_remaining, created_at)
+    VALUES(?,?,?,?)
+    ON CONFLICT(uid) DO UPDATE SET
+        creator_id=excluded.creator_id,
+        days_remaining=excluded.days_remaining
+"""
+SQL_TASKS_FOR_USER = "SELECT uid, days_remaining, created_at FROM tasks WHERE creator_id = ? AND days_remaining > 0 ORDER BY uid LIMIT ?"
+SQL_LIVE_TASKS = "SELECT uid, creator_id, days_remaining FROM tasks WHERE days_remaining > 0 ORDER BY uid"
+SQL_DELETE_EXPIRED = "DELETE FROM tasks WHERE days_remaining <= 0"
+SQL_DELETE_TASK = "DELETE FROM tasks WHERE uid = ?"
+SQL_DECREMENT_DAYS = "UPDATE tasks SET days_remaining = days_remaining - 1 WHERE days_remaining > 0 AND uid IN ({})"
+SQL_BATCH_SIZE = 500  # bound variables per IN (...) list; old SQLite builds cap at 999
+SQL_ADD_DAYS = "UPDATE tasks SET days_remaining = MAX(0, days_remaining + ?) WHERE uid = ? RETURNING days_remaining"
+
 CON = db_connect()
 with CON:
     CON.execute("""
@@ -54,69 +85,132 @@ with CON:
             created_at TEXT NOT NULL
         )
     """)
+    # covers /myautos entirely: seek by creator, read every selected column from the index
+    CON.execute("CREATE INDEX IF NOT EXISTS idx_tasks_creator_cover ON tasks(creator_id, uid, days_remaining, created_at)")
+    CON.execute("DROP INDEX IF EXISTS idx_tasks_creator")
 
 def upsert_task(uid: str, creator_id: int, days: int):
     with CON:
-        CON.execute("""
-            INSERT INTO tasks(uid, creator_id, days_remaining, created_at)
-            VALUES(?,?,?,?)
-            ON CONFLICT(uid) DO UPDATE SET
-                creator_id=excluded.creator_id,
-                days_remaining=excluded.days_remaining
-        """, (uid, creator_id, days, datetime.now(TZ).isoformat()))
+        CON.execute(SQL_UPSERT_TASK, (uid, creator_id, days, datetime.now(TZ).isoformat(timespec="seconds")))
     return True
 
-def get_tasks_for_user(creator_id: int):
-    cur = CON.execute("SELECT uid, days_remaining, created_at FROM tasks WHERE creator_id = ? ORDER BY uid", (creator_id,))
+def get_tasks_for_user(creator_id: int, limit: int = -1):
+    cur = CON.execute(SQL_TASKS_FOR_USER, (creator_id, limit))
     return cur.fetchall()
 
 def get_all_tasks():
-    cur = CON.execute("SELECT uid, creator_id, days_remaining FROM tasks ORDER BY uid")
+    cur = CON.execute(SQL_LIVE_TASKS)
     return cur.fetchall()
 
+def use_up_task_day(uids: list):
+    # one transaction: take a day off every liked task, then drop the ones that hit 0
+    with CON:
+        for i in range(0, len(uids), SQL_BATCH_SIZE):
+            chunk = uids[i:i + SQL_BATCH_SIZE]
+            CON.execute(SQL_DECREMENT_DAYS.format(",".join("?" * len(chunk))), chunk)
+        CON.execute(SQL_DELETE_EXPIRED)
+
+def optimize_db():
+    # lets SQLite refresh planner stats for tables whose contents shifted since the last run
+    CON.execute("PRAGMA optimize")
+
 def remove_task(uid: str):
     with CON:
-        cur = CON.execute("DELETE FROM tasks WHERE uid = ?", (uid,))
+        cur = CON.execute(SQL_DELETE_TASK, (uid,))
     return cur.rowcount > 0
 
 def extend_task_days(uid: str, delta_days: int) -> Optional[int]:
     with CON:
-        cur = CON.execute("SELECT days_remaining FROM tasks WHERE uid = ?", (uid,))
-        row = cur.fetchone()
-        if not row:
-            return None
-        new_days = max(0, row["days_remaining"] + delta_days)
-        CON.execute("UPDATE tasks SET days_remaining = ? WHERE uid = ?", (new_days, uid))
-        return new_days
+        rows = CON.execute(SQL_ADD_DAYS, (delta_days, uid)).fetchall()
+    return rows[0]["days_remaining"] if rows else None
 
 # ----------------------------
-# Like API via urllib (no requests dep)
+# Like API via aiohttp (one shared session)
 # ----------------------------
-def call_like_api(uid: str) -> (bool, str):
-    qs = urlencode({"uid": uid, "server_name": SERVER_NAME, "key": LIKE_API_KEY})
-    url = f"{LIKE_API_BASE}?{qs}"
-    req = Request(url, headers={"User-Agent": "ff-like-bot/1.0"})
-    try:
-        with urlopen(req, timeout=20) as resp:
-            status = resp.getcode()
-            body = resp.read().decode("utf-8", errors="replace")
-            try:
-                data = json.loads(body)
-                success = bool(data.get("success", 200 <= status < 300))
-                msg = data.get("message") or data.get("msg") or body[:200]
-                return success, msg
-            except json.JSONDecodeError:
-                return (200 <= status < 300), (body[:200] if body else f"HTTP {status}")
-    except HTTPError as e:
+HTTP: Optional[aiohttp.ClientSession] = None
+LIKE_SEM = asyncio.Semaphore(LIKE_CONCURRENCY)
+LIKE_API_PARAMS = {"server_name": SERVER_NAME, "key": LIKE_API_KEY}
+LIKE_RETRY_AFTER_MAX = 10.0  # cap on how long a 429 Retry-After may hold a caller
+LIKE_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+LIKE_INFLIGHT: dict = {}  # uid -> task for the upstream call currently running
+LIKE_RESULTS: dict = {}  # uid -> (ok, msg, expires_at) of a recent successful call
+
+async def call_like_api(uid: str, force: bool = False) -> (bool, str):
+    # a repeat /like shortly after a success gets the same answer without another upstream hit
+    if not force:
+        hit = LIKE_RESULTS.get(uid)
+        if hit is not None:
+            if hit[2] > asyncio.get_running_loop().time():
+                return hit[:2]
+            del LIKE_RESULTS[uid]
+    # concurrent requests for the same UID ride on one upstream call
+    task = LIKE_INFLIGHT.get(uid)
+    if task is None:
+        task = asyncio.ensure_future(_request_like(uid))
+        LIKE_INFLIGHT[uid] = task
+        task.add_done_callback(lambda t: _like_done(uid, t))
+    return await asyncio.shield(task)
+
+def _like_done(uid: str, task: asyncio.Task):
+    LIKE_INFLIGHT.pop(uid, None)
+    if task.cancelled() or task.exception() is not None or LIKE_CACHE_TTL <= 0:
+        return
+    ok, msg = task.result()
+    if ok:
+        now = asyncio.get_running_loop().time()
+        # drop expired entries so UIDs that are never asked for again don't pile up
+        for stale in [u for u, hit in LIKE_RESULTS.items() if hit[2] <= now]:
+            del LIKE_RESULTS[stale]
+        LIKE_RESULTS[uid] = (ok, msg, now + LIKE_CACHE_TTL)
+
+async def _request_like(uid: str) -> (bool, str):
+    retry_after = 0.0
+    for attempt in range(LIKE_API_RETRIES + 1):
+        if attempt:
+            await asyncio.sleep(max(0.5 * 2 ** (attempt - 1), retry_after))  # 0.5s, 1s, ... unless told to wait longer
+            retry_after = 0.0
         try:
-            detail = e.read().decode("utf-8", errors="replace")
-        except Exception:
-            detail = ""
-        return False, f"HTTP {e.code}: {detail[:200]}"
-    except URLError as e:
-        return False, f"Network error: {e.reason}"
-    except Exception as e:
-        return False, f"Unexpected error: {e}"
+            async with LIKE_SEM, HTTP.get(LIKE_API_BASE, params={**LIKE_API_PARAMS, "uid": uid}) as resp:
+                status = resp.status
+                body = (await resp.read()).decode("utf-8", errors="replace")
+                if status == 429:
+                    retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+        except asyncio.TimeoutError:
+            # already waited the full timeout; don't make the caller wait it again
+            return False, "Network error: timed out"
+        except aiohttp.ClientError as e:
+            result = False, f"Network error: {e}"
+            continue
+        except Exception as e:
+            return False, f"Unexpected error: {e}"
+        if status in LIKE_RETRY_STATUSES:
+            result = False, f"HTTP {status}: {body[:200]}"
+            if retry_after > LIKE_RETRY_AFTER_MAX:
+                break  # upstream wants us gone longer than a caller should wait
+            continue
+        return parse_like_response(status, body)
+    return result
+
+def parse_retry_after(value: Optional[str]) -> float:
+    # only the delay-seconds form; an HTTP-date falls back to the normal backoff
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return 0.0
+
+def parse_like_response(status: int, body: str) -> (bool, str):
+    if status >= 400:
+        return False, f"HTTP {status}: {body[:200]}"
+    if not body.lstrip().startswith("{"):
+        # plain-text reply, nothing to decode
+        return (200 <= status < 300), (body[:200] if body else f"HTTP {status}")
+    try:
+        data = json.loads(body)
+        success = bool(data.get("success", 200 <= status < 300))
+        msg = data.get("message") or data.get("msg") or body[:200]
+        return success, msg
+    except json.JSONDecodeError:
+        return (200 <= status < 300), (body[:200] if body else f"HTTP {status}")
 
 # ----------------------------
 # Helpers
@@ -124,6 +218,15 @@ def call_like_api(uid: str) -> (bool, str):
 def is_admin(user_id: int) -> bool:
     return user_id in ADMIN_IDS
 
+def admin_only(handler):
+    @functools.wraps(handler)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if not is_admin(update.effective_user.id):
+            await update.message.reply_text("এই কমান্ডটি শুধুমাত্র admin ব্যবহার করতে পারবে।")
+            return
+        return await handler(update, context)
+    return wrapper
+
 HELP_TEXT = (
     "Free Fire Auto Like Bot\n\n"
     "/like <uid> — Like পাঠাবে (requires permission)\n"
@@ -137,6 +240,14 @@ HELP_TEXT = (
     "Extra: /extendauto <uid> <+/-days> — টাস্কের দিন বাড়ানো/কমানো (admin only)"
 )
 
+MYAUTOS_MAX_ROWS = 50  # keeps the /myautos reply under Telegram's 4096-char limit
+DAYS_MAX_DIGITS = 6  # /auto and /extendauto day counts stay below a million
+
+USAGE_LIKE = "ব্যবহার: /like <uid>\nউদাহরণ: /like 1234567890"
+USAGE_AUTO = "ব্যবহার: /auto <uid> <days>\nউদাহরণ: /auto 8385763215 30"
+USAGE_REMOVEAUTO = "ব্যবহার: /removeauto <uid>"
+USAGE_EXTENDAUTO = "ব্যবহার: /extendauto <uid> <+/-days>\nউদাহরণ: /extendauto 8385763215 +7"
+
 # ----------------------------
 # Commands
 # ----------------------------
@@ -146,26 +257,34 @@ async def start_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def help_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(HELP_TEXT)
 
+def is_ascii_decimal(s: str) -> bool:
+    # isdigit() takes '²' (int() raises) and isdecimal() alone takes '১২৩' (a different UID than '123')
+    return s.isascii() and s.isdecimal()
+
+def is_day_count(s: str) -> bool:
+    digits = s[1:] if s[:1] in ("+", "-") else s
+    # bounded so int() can't outgrow SQLite's 64-bit INTEGER
+    return len(digits) <= DAYS_MAX_DIGITS and is_ascii_decimal(digits)
+
 async def like_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     args = context.args
-    if not args:
-        await update.message.reply_text("ব্যবহার: /like <uid>\nউদাহরণ: /like 1234567890")
+    # UIDs are numeric; reject anything else before spending an API call on it
+    if not args or not is_ascii_decimal(args[0].strip()):
+        await update.message.reply_text(USAGE_LIKE)
         return
     uid = args[0].strip()
-    ok, msg = call_like_api(uid)
+    ok, msg = await call_like_api(uid)
     if ok:
         await update.message.reply_text(f"✅ Like sent to UID {uid}\nResponse: {msg}")
     else:
         await update.message.reply_text(f"❌ Failed for UID {uid}\nError: {msg}")
 
+@admin_only
 async def auto_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    if not is_admin(user_id):
-        await update.message.reply_text("এই কমান্ডটি শুধুমাত্র admin ব্যবহার করতে পারবে।")
-        return
     args = context.args
-    if len(args) < 2 or not args[1].lstrip("-").isdigit():
-        await update.message.reply_text("ব্যবহার: /auto <uid> <days>\nউদাহরণ: /auto 8385763215 30")
+    if len(args) < 2 or not is_ascii_decimal(args[0].strip()) or not is_day_count(args[1]):
+        await update.message.reply_text(USAGE_AUTO)
         return
     uid = args[0].strip()
     days = int(args[1])
@@ -177,19 +296,22 @@ async def auto_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def myautos_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    rows = get_tasks_for_user(user_id)
+    # one extra row tells us whether there are more than we show
+    rows = get_tasks_for_user(user_id, MYAUTOS_MAX_ROWS + 1)
     if not rows:
         await update.message.reply_text("আপনার কোনো active auto like টাস্ক নেই।")
         return
     lines = ["আপনার Auto Like টাস্ক:"]
-    for r in rows:
+    for r in rows[:MYAUTOS_MAX_ROWS]:
         lines.append(f"• UID {r['uid']} — {r['days_remaining']} দিন বাকি (added: {r['created_at']})")
+    if len(rows) > MYAUTOS_MAX_ROWS:
+        lines.append("…আরও আছে")
     await update.message.reply_text("\n".join(lines))
 
 async def removeauto_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     args = context.args
     if not args:
-        await update.message.reply_text("ব্যবহার: /removeauto <uid>")
+        await update.message.reply_text(USAGE_REMOVEAUTO)
         return
     uid = args[0].strip()
     if remove_task(uid):
@@ -197,22 +319,19 @@ async def removeauto_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     else:
         await update.message.reply_text(f"কোনো টাস্ক পাওয়া যায়নি UID {uid} এর জন্য।")
 
+@admin_only
 async def stauto_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.effective_user.id
-    if not is_admin(user_id):
-        await update.message.reply_text("এই কমান্ডটি শুধুমাত্র admin ব্যবহার করতে পারবে।")
+    if DAILY_JOB_LOCK.locked():
+        await update.message.reply_text("Auto-like process ইতিমধ্যে চলছে, একটু পরে আবার চেষ্টা করুন।")
         return
     ok_cnt, fail_cnt = await run_daily_jobs(context)
     await update.message.reply_text(f"Manual auto-like সম্পন্ন। ✅ {ok_cnt}, ❌ {fail_cnt}")
 
+@admin_only
 async def extendauto_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.effective_user.id
-    if not is_admin(user_id):
-        await update.message.reply_text("এই কমান্ডটি শুধুমাত্র admin ব্যবহার করতে পারবে।")
-        return
     args = context.args
-    if len(args) < 2 or not args[1].lstrip("-").isdigit():
-        await update.message.reply_text("ব্যবহার: /extendauto <uid> <+/-days>\nউদাহরণ: /extendauto 8385763215 +7")
+    if len(args) < 2 or not is_day_count(args[1]):
+        await update.message.reply_text(USAGE_EXTENDAUTO)
         return
     uid = args[0].strip()
     delta = int(args[1])
@@ -225,35 +344,67 @@ async def extendauto_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # ----------------------------
 # Daily job
 # ----------------------------
+DAILY_JOB_LOCK = asyncio.Lock()  # scheduled and /stauto runs must not overlap
+TG_MAX_MESSAGE = 4096
+
+def build_failure_notices(failures: list) -> list:
+    # one message per creator listing all of their failed UIDs, split only if it outgrows Telegram's limit
+    by_creator = defaultdict(list)
+    for cid, uid, msg in failures:
+        by_creator[cid].append(f"• UID {uid}\nকারণ: {str(msg)[:200]}")
+    header, cont = "❌ Auto-like FAILED", "❌ Auto-like FAILED (cont.)"
+    max_line = TG_MAX_MESSAGE - len(cont) - 1  # a line must fit after either header on its own
+    notices = []
+    for cid, lines in by_creator.items():
+        text = header
+        for line in lines:
+            line = line[:max_line]
+            # split only once the message holds a line, so no header-only notice goes out
+            if text not in (header, cont) and len(text) + 1 + len(line) > TG_MAX_MESSAGE:
+                notices.append((cid, text))
+                text = cont
+            text += "\n" + line
+        notices.append((cid, text))
+    return notices
+
 async def run_daily_jobs(context: ContextTypes.DEFAULT_TYPE):
+    async with DAILY_JOB_LOCK:
+        return await _run_daily_jobs(context)
+
+async def _run_daily_jobs(context: ContextTypes.DEFAULT_TYPE):
     rows = get_all_tasks()
-    ok_cnt, fail_cnt = 0, 0
-    for r in rows:
-        uid = r["uid"]
-        days = r["days_remaining"]
-        if days <= 0:
-            remove_task(uid)
-            continue
-        ok, msg = call_like_api(uid)
+    results = []
+    for i in range(0, len(rows), LIKE_BATCH_SIZE):
+        if i:
+            # small jittered gap between batches so the 7:00 run isn't one burst upstream
+            await asyncio.sleep(random.uniform(0.5, 1.5))
+        batch = rows[i:i + LIKE_BATCH_SIZE]
+        results += await asyncio.gather(*(call_like_api(r["uid"], force=True) for r in batch))
+    ok_uids, failures = [], []
+    for r, (ok, msg) in zip(rows, results):
         if ok:
-            ok_cnt += 1
-            extend_task_days(uid, -1)
-            with CON:
-                cur = CON.execute("SELECT days_remaining FROM tasks WHERE uid = ?", (uid,))
-                left = cur.fetchone()["days_remaining"]
-            if left <= 0:
-                remove_task(uid)
+            ok_uids.append(r["uid"])
         else:
-            fail_cnt += 1
-            try:
-                await context.bot.send_message(chat_id=r["creator_id"],
-                                               text=f"❌ Auto-like FAILED for UID {uid}\nকারণ: {msg}")
-            except Exception as e:
-                log.warning(f"Notify failed: {e}")
+            failures.append((r["creator_id"], r["uid"], msg))
+    use_up_task_day(ok_uids)
+    optimize_db()
+    ok_cnt, fail_cnt = len(ok_uids), len(failures)
+    # AIORateLimiter only paces private chats by the global 30/s limit; staying
+    # under Telegram's per-chat limit relies on each creator getting one notice
+    notified = await asyncio.gather(*(
+        context.bot.send_message(chat_id=cid, text=text)
+        for cid, text in build_failure_notices(failures)
+    ), return_exceptions=True)
+    for res in notified:
+        if isinstance(res, Exception):
+            log.warning(f"Notify failed: {res}")
     log.info(f"Daily job done: ok={ok_cnt}, fail={fail_cnt}")
     return ok_cnt, fail_cnt
 
 async def daily_job_callback(context: ContextTypes.DEFAULT_TYPE):
+    if DAILY_JOB_LOCK.locked():
+        log.info("Daily job skipped: a manual run is in progress")
+        return
     await run_daily_jobs(context)
 
 # ----------------------------
@@ -262,6 +413,19 @@ async def daily_job_callback(context: ContextTypes.DEFAULT_TYPE):
 async def health_handler(_request):
     return web.Response(text="ok")
 
+async def on_startup(application: Application):
+    global HTTP
+    HTTP = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit_per_host=LIKE_CONCURRENCY, ttl_dns_cache=300, keepalive_timeout=60),
+        timeout=aiohttp.ClientTimeout(total=20),
+        headers={"User-Agent": "ff-like-bot/1.0"},
+    )
+
+async def on_shutdown(application: Application):
+    if HTTP is not None:
+        await HTTP.close()
+    optimize_db()
+
 def make_web_app(application: Application) -> web.Application:
     app = web.Application()
     app.router.add_get(HEALTH_PATH, health_handler)
@@ -273,7 +437,15 @@ def main():
     if not WEBHOOK_BASE:
         raise RuntimeError("Set WEBHOOK_BASE env var to your public Render URL")
 
-    application: Application = ApplicationBuilder().token(BOT_TOKEN).build()
+    application: Application = (
+        ApplicationBuilder()
+        .token(BOT_TOKEN)
+        .concurrent_updates(True)
+        .rate_limiter(AIORateLimiter())
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
 
     application.add_handler(CommandHandler("start", start_cmd))
     application.add_handler(CommandHandler("help", help_cmd))
@@ -298,6 +470,7 @@ def main():
         url_path=WEBHOOK_PATH.lstrip("/"),
         webhook_url=webhook_url,
         secret_token=WEBHOOK_SECRET,
+        max_connections=WEBHOOK_MAX_CONNECTIONS,
         web_app=web_app,
         drop_pending_updates=True,
     )